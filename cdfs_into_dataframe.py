@@ -29,12 +29,12 @@ def cdf_to_np(cdfdata,filename):
     np_data=np.array(cdfdata['data'],dtype=np.float32)
     npdata['data_a']=np.squeeze(np_data[:,0])
     npdata['data_c']=np.squeeze(np_data[:,2])
+    # uncertainties on data_a/data_c, same column layout as 'data'
+    np_ddata=np.array(cdfdata['ddata'],dtype=np.float32)
+    npdata['ddata_a']=np.squeeze(np_ddata[:,0])
+    npdata['ddata_c']=np.squeeze(np_ddata[:,2])
     #all other lines need squeezing to work
-    #np_ddata=np.array(cdfdata['ddata'],dtype=np.float32)
-    #npdata['ddata_a']=np_ddata[:,0]
-    #npdata['ddata_c']=np_ddata[:,2]
     #npdata['data'] = np.array(cdfdata['data'],dtype=np.float32)
-    #npdata['ddata'] = np.array(cdfdata['ddata'],dtype=np.float32)
     #npdata['dfreq'] = np.array(cdfdata['dfreq'],dtype=np.float32)
     #npdata['counts'] = np.array(cdfdata['counts'],dtype=np.float32)
     # We'd like to do:
@@ -67,7 +67,3 @@ for filename in cdf_files:
 # Method 1: Using pd.concat()
 combined_df = pd.concat(npdata_dict.values(), ignore_index=True)
 
-
-#np_ddata=np.array(cdfdata['ddata'],dtype=np.float32)
-#npdata['ddata_a']=np_ddata[:,0]
-
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:02:17 2026
+
+Error bars for the integrated areas in energy_analysis_results.csv.
+For every row (flare window) the EUV 'ddata' uncertainties for diodes A and C
+are propagated through the trapezoid and Simpson integrals, with and without
+the endpoint background that process_cdf subtracts.
+
+Both rules are linear in the irradiance, area = sum(w_i * y_i), so with
+independent errors sigma = sqrt(sum((w_i * dy_i)**2)) and the analytic errors
+are just a weight vector per window. The optional Monte Carlo mode draws
+N realizations as one (N, n_samples) array per window, chunked over N so the
+memory use stays bounded no matter how many realizations are asked for.
+"""
+
+import os
+import re
+import numpy as np
+import pandas as pd
+from scipy.integrate import simpson, trapezoid
+from parameter_sweep import load_cdf, convert_hhmmss_to_unix, cartwright_coefficients
+
+N_REALIZATIONS = 1000  # default number of Monte Carlo realizations, 0 for the analytic errors only
+
+# Function to rebuild the download URL of a CDF from its filename
+def cdf_url_from_filename(filename):
+    url_template = 'https://lasp.colorado.edu/maven/sdc/public/data/sci/euv/l2/{year}/{month}/'
+    match = re.search(r'_(\d{4})(\d{2})\d{2}_', filename)
+    if match is None:
+        raise ValueError(f"Can't find a date in CDF filename: {filename}")
+    return url_template.format(year=match.group(1), month=match.group(2)) + filename
+
+# Function to get the trapezoid weights, trapezoid(y, t) == trapz_weights(t) @ y
+def trapz_weights(t):
+    w = np.zeros(t.size)
+    if t.size > 1:
+        dt = np.diff(t)
+        w[:-1] += 0.5 * dt
+        w[1:] += 0.5 * dt
+    return w
+
+# Function to get the composite Simpson weights for an even number of intervals
+def _simpson_pair_weights(t):
+    w = np.zeros(t.size)
+    dt = np.diff(t)
+    h0 = dt[0::2]
+    h1 = dt[1::2]
+    hsum = h0 + h1
+    w[0:-1:2] += hsum / 6.0 * (2.0 - h1 / h0)
+    w[1::2] += hsum / 6.0 * (hsum * hsum / (h0 * h1))
+    w[2::2] += hsum / 6.0 * (2.0 - h0 / h1)
+    return w
+
+# Function to get the Simpson weights, simpson(y, x=t) == simps_weights(t) @ y
+def simps_weights(t):
+    """
+    Odd number of samples: composite Simpson rule.
+    Even number of samples: Simpson on all but the last interval plus the
+    Cartwright correction for the last one, same as simpson() in scipy >= 1.11.
+    """
+    n = t.size
+    if n < 3:
+        return trapz_weights(t)
+    if n % 2 == 1:
+        return _simpson_pair_weights(t)
+    w = np.zeros(n)
+    w[:-1] = _simpson_pair_weights(t[:-1])
+    alpha, beta, eta = cartwright_coefficients(t[-2] - t[-3], t[-1] - t[-2])
+    w[-1] += alpha
+    w[-2] += beta
+    w[-3] -= eta
+    return w
+
+# Function to turn integration weights into the weights of the area above the endpoint background
+def above_background_weights(t, w):
+    # background = 0.5 * (y[0] + y[-1]) * (t[-1] - t[0]), same as process_cdf
+    w = w.copy()
+    duration = t[-1] - t[0]
+    w[0] -= 0.5 * duration
+    w[-1] -= 0.5 * duration
+    return w
+
+# Function to propagate the uncertainties analytically for one window
+def analytic_uncertainty(t, dy):
+    w_trapz = trapz_weights(t)
+    w_simps = simps_weights(t)
+    return {
+        'sigma_trapz': np.sqrt(np.sum((w_trapz * dy) ** 2)),
+        'sigma_simps': np.sqrt(np.sum((w_simps * dy) ** 2)),
+        'sigma_above_background_trapz': np.sqrt(np.sum((above_background_weights(t, w_trapz) * dy) ** 2)),
+        'sigma_above_background_simps': np.sqrt(np.sum((above_background_weights(t, w_simps) * dy) ** 2))
+    }
+
+# Function to estimate the uncertainties with Monte Carlo realizations for one window
+def monte_carlo_uncertainty(t, y, dy, n_realizations, max_elements=5_000_000, rng=None):
+    """
+    Draws n_realizations of y + dy * N(0, 1) as (chunk, n_samples) arrays, with
+    chunk chosen so that no more than max_elements values are held at once.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    chunk = max(1, max_elements // t.size)
+    duration = t[-1] - t[0]
+
+    areas_trapz = np.empty(n_realizations)
+    areas_simps = np.empty(n_realizations)
+    backgrounds = np.empty(n_realizations)
+    for first in range(0, n_realizations, chunk):
+        last = min(first + chunk, n_realizations)
+        draws = y + dy * rng.standard_normal((last - first, t.size))
+        areas_trapz[first:last] = trapezoid(draws, t, axis=1)
+        areas_simps[first:last] = simpson(draws, x=t, axis=1)
+        backgrounds[first:last] = 0.5 * (draws[:, 0] + draws[:, -1]) * duration
+
+    return {
+        'mc_sigma_trapz': np.std(areas_trapz, ddof=1),
+        'mc_sigma_simps': np.std(areas_simps, ddof=1),
+        'mc_sigma_above_background_trapz': np.std(areas_trapz - backgrounds, ddof=1),
+        'mc_sigma_above_background_simps': np.std(areas_simps - backgrounds, ddof=1)
+    }
+
+# Function to compute every uncertainty column for one flare window
+def window_uncertainty(day, start_time, end_time, n_realizations=0, rng=None):
+    in_window = (day['time_unix'] >= start_time) & (day['time_unix'] <= end_time)
+    t = day['time_unix'][in_window]
+    row = dict()
+    for diode in ['a', 'c']:
+        if t.size < 2:
+            # nothing to integrate, process_cdf writes 0 areas here
+            continue
+        y = day['data_' + diode][in_window]
+        dy = day['ddata_' + diode][in_window]
+        for key, value in analytic_uncertainty(t, dy).items():
+            row[f"{key}_{diode}"] = value
+        if n_realizations > 1:
+            for key, value in monte_carlo_uncertainty(t, y, dy, n_realizations, rng=rng).items():
+                row[f"{key}_{diode}"] = value
+    return row
+
+if __name__ == '__main__':
+    # Main code
+    input_file = 'energy_analysis_results.csv'
+    output_file = 'energy_uncertainty_results.csv'
+    n_realizations = N_REALIZATIONS
+    rng = np.random.default_rng(0)
+
+    results = pd.read_csv(input_file, dtype={'Date': str, 'start_time': str, 'end_time': str})
+
+    rows = []
+    for filename, flares in results.groupby('File', sort=False):
+        print(f"Propagating uncertainties for {len(flares)} flare(s) in {filename}")
+        day = load_cdf(cdf_url_from_filename(filename))
+        for index, flare in flares.iterrows():
+            start_time_unix = convert_hhmmss_to_unix(flare['Date'], flare['start_time'])
+            end_time_unix = convert_hhmmss_to_unix(flare['Date'], flare['end_time'])
+            row = window_uncertainty(day, start_time_unix, end_time_unix, n_realizations, rng)
+            row['index'] = index
+            rows.append(row)
+
+    uncertainties = pd.DataFrame(rows).set_index('index')
+    results = results.join(uncertainties)
+    results.to_csv(output_file, index=False)
+    print(f"Results with uncertainties have been saved to {os.path.abspath(output_file)}")
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:12:40 2026
+
+Parameter sweep for the integrated energy of each M/X flare.
+Instead of editing process_cdf in integrated_energy.py and re-downloading
+everything for every choice of window padding / baseline / integration rule,
+every matched CDF is downloaded and loaded once, then the whole grid of
+(pre padding, post padding, baseline) is evaluated for every flare on that day.
+
+Trapezoid areas and the pre-flare baseline means come straight out of prefix
+sums, so a window is just two np.searchsorted lookups. Simpson's rule on uneven
+spacing is a sum of per-pair terms, so it gets prefix sums too (one per parity
+of the first sample), plus the closed-form last-interval correction for even
+sample counts. The whole grid costs about as much as a single window.
+
+Output is one tidy table (one row per flare/pre/post/diode/method/baseline).
+"""
+
+import requests
+from bs4 import BeautifulSoup
+import os
+import numpy as np
+import pandas as pd
+from spacepy.pycdf import CDF
+from datetime import datetime
+import time
+
+# Function to get CDF files from a URL with retry logic
+def get_cdf_files(url, retries=5):
+    attempt = 0
+    while attempt < retries:
+        try:
+            response = requests.get(url)
+            response.raise_for_status()
+            soup = BeautifulSoup(response.text, 'html.parser')
+            cdf_files = [a['href'] for a in soup.find_all('a') if a['href'].endswith('.cdf')]
+            return cdf_files
+        except requests.exceptions.HTTPError as e:
+            if response.status_code == 429:
+                # Handle rate limiting by waiting before retrying
+                retry_after = int(response.headers.get("Retry-After", 5))  # Default to 5 seconds if header is missing
+                print(f"Rate limited. Retrying after {retry_after} seconds...")
+                time.sleep(retry_after)
+            else:
+                print(f"HTTP error occurred: {e}")
+                break
+        except requests.RequestException as e:
+            print(f"Request exception occurred: {e}")
+            break
+        attempt += 1
+        # Exponential backoff
+        time.sleep(2 ** attempt)
+    return []
+
+# Function to match dates in the flare catalog with CDF files
+def match_dates_with_cdf(file_path, cdf_urls):
+    with open(file_path, 'r') as file:
+        lines = file.readlines()[12:]  # Skip the first couple of lines
+        matched_dates = []
+        for line in lines:
+            stripped_line = line.strip()
+            if stripped_line[-4:].startswith(('M','X')):
+                date = stripped_line.split()[0]  # Extract the date part from the line
+                month, day, year = date.split('/')
+                date_formatted = f"{year}{month.zfill(2)}{day.zfill(2)}"  # Convert to CDF filename format
+                for base_url, cdf_url in cdf_urls:
+                    if date_formatted in cdf_url:
+                        full_url = base_url + cdf_url
+                        matched_dates.append((date, line, full_url))
+                        break  # No need to check other URLs once a match is found
+        return matched_dates
+
+# Function to convert HH:MM:SS format to Unix time
+def convert_hhmmss_to_unix(date, time_str):
+    """
+    Convert date and time (in HH:MM:SS format) to Unix timestamp.
+    Same convention as integrated_energy.py so the two outputs line up.
+    """
+    date_time_str = f"{date} {time_str}"
+    dt = datetime.strptime(date_time_str, '%m/%d/%Y %H:%M:%S')
+    return int(dt.timestamp())
+
+# Function to read the variables we need from a CDF on disk
+def read_cdf(path):
+    with CDF(path) as cdf:
+        # reading whole variables with a dtype is much faster than indexing row by row
+        time_unix = np.array(cdf['time_unix'], dtype=np.float64)
+        flag = np.array(cdf['flag'], dtype=np.int64)
+        data = np.array(cdf['data'], dtype=np.float64)
+        ddata = np.array(cdf['ddata'], dtype=np.float64)
+    return time_unix, flag, data, ddata
+
+# Function to download a CDF once and keep the good (flag=0) samples as numpy arrays
+def load_cdf(file_url):
+    if os.path.isfile(file_url):
+        # already on disk (local mirror), no need to download
+        return good_samples(file_url, *read_cdf(file_url))
+
+    temp_file_path = 'temp_sweep.cdf'
+    try:
+        response = requests.get(file_url)
+        response.raise_for_status()
+
+        with open(temp_file_path, 'wb') as temp_file:
+            temp_file.write(response.content)
+
+        variables = read_cdf(temp_file_path)
+    finally:
+        # Ensure the temporary file is removed even if an error occurs
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+
+    return good_samples(file_url, *variables)
+
+# Function to keep the flag=0 samples of diodes A and C
+def good_samples(file_url, time_unix, flag, data, ddata):
+    good = flag == 0
+    return {
+        'file': os.path.basename(file_url),
+        'time_unix': time_unix[good],
+        'data_a': data[good, 0],
+        'data_c': data[good, 2],
+        'ddata_a': ddata[good, 0],
+        'ddata_c': ddata[good, 2]
+    }
+
+# Function to get the Cartwright correction for the last interval of an even sample count
+def cartwright_coefficients(h0, h1):
+    """
+    h0, h1: the last two spacings. simpson() (scipy >= 1.11) integrates an even
+    number of samples as Simpson on all but the last interval plus
+    alpha * y[-1] + beta * y[-2] - eta * y[-3].
+    """
+    alpha = (2 * h1 ** 2 + 3 * h0 * h1) / (6 * (h1 + h0))
+    beta = (h1 ** 2 + 3 * h0 * h1) / (6 * h0)
+    eta = h1 ** 3 / (6 * h0 * (h0 + h1))
+    return alpha, beta, eta
+
+# Function to build the prefix sums used by every window on one day
+def prefix_sums(t, y):
+    dt = np.diff(t)
+    # cum_trapz[k] = trapezoid area from sample 0 to sample k
+    cum_trapz = np.zeros(t.size)
+    cum_trapz[1:] = np.cumsum(0.5 * (y[1:] + y[:-1]) * dt)
+    # cum_simps[k] = Simpson area of the pairs starting at k-2, k-4, ... (same parity as k),
+    # so the pairs of a window [i0, i1] with i1 - i0 even sum to cum_simps[i1] - cum_simps[i0]
+    h0 = dt[:-1]
+    h1 = dt[1:]
+    hsum = h0 + h1
+    pair = hsum / 6.0 * (y[:-2] * (2.0 - h1 / h0) + y[1:-1] * (hsum * hsum / (h0 * h1)) + y[2:] * (2.0 - h0 / h1))
+    cum_simps = np.zeros(t.size)
+    cum_simps[2::2] = np.cumsum(pair[0::2])
+    cum_simps[3::2] = np.cumsum(pair[1::2])
+    # cum_y[k] = sum of the first k samples (for baseline means)
+    cum_y = np.zeros(t.size + 1)
+    cum_y[1:] = np.cumsum(y)
+    return cum_trapz, cum_simps, cum_y
+
+# Function to evaluate the whole (flare, pre, post) grid for one diode on one day
+def sweep_diode(t, y, flare_starts, flare_ends, pre_offsets, post_offsets, baselines):
+    """
+    flare_starts/flare_ends: (n_flares,) catalog times in unix seconds.
+    pre_offsets/post_offsets: padding in seconds added before the catalog start
+    and after the catalog end.
+    Returns a dict of arrays, each shaped (n_flares, n_pre, n_post), plus one
+    baseline-area array per baseline method.
+    """
+    cum_trapz, cum_simps, cum_y = prefix_sums(t, y)
+
+    window_start = flare_starts[:, None, None] - pre_offsets[None, :, None]
+    window_end = flare_ends[:, None, None] + post_offsets[None, None, :]
+    window_start, window_end = np.broadcast_arrays(window_start, window_end)
+
+    # inclusive sample range [i0, i1], same as start_time <= t <= end_time in process_cdf
+    i0 = np.searchsorted(t, window_start, side='left')
+    i1 = np.searchsorted(t, window_end, side='right') - 1
+    n_samples = np.maximum(i1 - i0 + 1, 0)
+    valid = n_samples >= 2
+    i0c = np.clip(i0, 0, max(t.size - 1, 0))
+    i1c = np.clip(i1, 0, max(t.size - 1, 0))
+
+    area_trapz = np.where(valid, cum_trapz[i1c] - cum_trapz[i0c], np.nan)
+
+    # Simpson, matching simpson(y[i0:i1 + 1], x=t[i0:i1 + 1]) for every window
+    odd = valid & (n_samples % 2 == 1)
+    even = valid & (n_samples % 2 == 0) & (n_samples >= 4)
+    area_simps = np.full(i0.shape, np.nan)
+    area_simps[odd] = (cum_simps[i1c] - cum_simps[i0c])[odd]
+    if even.any():
+        a, b = i0c[even], i1c[even]
+        alpha, beta, eta = cartwright_coefficients(t[b - 1] - t[b - 2], t[b] - t[b - 1])
+        area_simps[even] = cum_simps[b - 1] - cum_simps[a] + alpha * y[b] + beta * y[b - 1] - eta * y[b - 2]
+    area_simps[valid & (n_samples == 2)] = area_trapz[valid & (n_samples == 2)]
+
+    duration = np.where(valid, t[i1c] - t[i0c], np.nan)
+    baseline_areas = {}
+    for baseline in baselines:
+        if baseline == 'none':
+            baseline_areas[baseline] = np.where(valid, 0.0, np.nan)
+        elif baseline == 'endpoints':
+            # trapezoid under the straight line joining the first and last samples (the process_cdf background)
+            baseline_areas[baseline] = np.where(valid, 0.5 * (y[i0c] + y[i1c]) * duration, np.nan)
+        elif baseline == 'pre_mean':
+            # mean irradiance over the pre-flare padding, held flat across the window
+            j = np.searchsorted(t, np.broadcast_to(flare_starts[:, None, None], i0.shape), side='left')
+            n_pre = j - i0
+            with np.errstate(invalid='ignore', divide='ignore'):
+                pre_mean = (cum_y[j] - cum_y[np.minimum(i0, t.size)]) / n_pre
+            baseline_areas[baseline] = np.where(valid & (n_pre > 0), pre_mean * duration, np.nan)
+        else:
+            raise ValueError(f"Unknown baseline method: {baseline}")
+
+    return {
+        'n_samples': n_samples,
+        'trapz': area_trapz,
+        'simps': area_simps,
+        'baselines': baseline_areas
+    }
+
+# Function to turn the swept grids for one day into tidy rows
+def sweep_day(day, flares, pre_offsets, post_offsets, baselines):
+    if day['time_unix'].size < 2:
+        print(f"No good (flag=0) data found in {day['file']}")
+        return []
+    flare_starts = np.array([f['start_time_unix'] for f in flares], dtype=np.float64)
+    flare_ends = np.array([f['end_time_unix'] for f in flares], dtype=np.float64)
+    pre_grid, post_grid = np.meshgrid(pre_offsets, post_offsets, indexing='ij')
+
+    frames = []
+    for diode in ['a', 'c']:
+        swept = sweep_diode(day['time_unix'], day['data_' + diode], flare_starts, flare_ends,
+                            pre_offsets, post_offsets, baselines)
+        for flare_index, flare in enumerate(flares):
+            for method in ['trapz', 'simps']:
+                for baseline in baselines:
+                    area = swept[method][flare_index]
+                    baseline_area = swept['baselines'][baseline][flare_index]
+                    frames.append(pd.DataFrame({
+                        'Date': flare['date'],
+                        'start_time': flare['start_time'],
+                        'end_time': flare['end_time'],
+                        'File': day['file'],
+                        'pre_offset_s': pre_grid.ravel(),
+                        'post_offset_s': post_grid.ravel(),
+                        'diode': diode.upper(),
+                        'method': method,
+                        'baseline': baseline,
+                        'n_samples': swept['n_samples'][flare_index].ravel(),
+                        'area': area.ravel(),
+                        'baseline_area': baseline_area.ravel(),
+                        'area_above_background': (area - baseline_area).ravel()
+                    }))
+    return frames
+
+# Function to generate URLs for given years and months
+def generate_url_list(start_year, end_year):
+    url_template = 'https://lasp.colorado.edu/maven/sdc/public/data/sci/euv/l2/{year}/{month:02}/'
+    urls = []
+    for year in range(start_year, end_year + 1):
+        for month in range(1, 12): #yes, this is only for months 1 -11 because there is no data for 2023/12 yet
+            urls.append(url_template.format(year=year, month=month))
+    return urls
+
+if __name__ == '__main__':
+    # Main code
+    file_path = 'flare catalog.txt'
+    start_year = 2023
+    end_year = 2023
+    # padding (seconds) before the catalog start and after the catalog end
+    pre_offsets = np.arange(0, 3601, 300)
+    post_offsets = np.arange(0, 3601, 300)
+    baselines = ['none', 'endpoints', 'pre_mean']
+    output_file = 'energy_sweep_results.csv'
+
+    url_list = generate_url_list(start_year, end_year)
+
+    cdf_urls = []
+    for url in url_list:
+        try:
+            cdf_files = get_cdf_files(url)
+            cdf_urls.extend([(url, cdf_file) for cdf_file in cdf_files])
+        except requests.RequestException as e:
+            print(f"Failed to retrieve CDF files from {url}: {e}")
+
+    matched_dates = match_dates_with_cdf(file_path, cdf_urls)
+
+    # group the flares by CDF so each day is only downloaded once
+    flares_by_file = dict()
+    for date, line, file_url in matched_dates:
+        start_time_str = line.split()[1]
+        end_time_str = line.split()[3]
+        flares_by_file.setdefault(file_url, []).append({
+            'date': date,
+            'start_time': start_time_str,
+            'end_time': end_time_str,
+            'start_time_unix': convert_hhmmss_to_unix(date, start_time_str),
+            'end_time_unix': convert_hhmmss_to_unix(date, end_time_str)
+        })
+
+    frames = []
+    for file_url, flares in flares_by_file.items():
+        print(f"Sweeping {len(flares)} flare(s) in {os.path.basename(file_url)}")
+        day = load_cdf(file_url)
+        frames.extend(sweep_day(day, flares, pre_offsets, post_offsets, baselines))
+
+    if not frames:
+        print(f"No flare windows to sweep, {output_file} was not written")
+    else:
+        results = pd.concat(frames, ignore_index=True)
+        results.to_csv(output_file, index=False)
+        print(f"{len(results)} rows ({len(pre_offsets) * len(post_offsets)} windows x {len(baselines)} baselines per flare, diode and method) saved to {output_file}")
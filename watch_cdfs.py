@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 16:40:05 2026
+
+Watch mode for new EUV data.
+Polls the month listings of the L2 archive (or a local mirror with the same
+YYYY/MM/ layout) for mvn_euv_l2_bands_*.cdf files. Only days that are new, or
+whose file got a new version/revision, are run through catalog matching,
+ingestion and integration. Their rows in energy_analysis_results.csv, and in
+energy_uncertainty_results.csv / energy_sweep_results.csv when those exist,
+are replaced in place, and everything else in the files is left alone.
+
+The catalog is re-read on every poll. A day is also reprocessed when its M/X
+flares in the catalog change, so extending or correcting the catalog picks up
+days that were already downloaded (and drops rows for flares that were removed).
+
+For each day the JSON state file remembers the CDF file and the catalog flares
+it was processed with, so the script can either keep running (default) or be
+run from cron with --once. Without a state file it starts from the File,
+Date, start_time and end_time columns of the results file.
+
+    python watch_cdfs.py --once
+    python watch_cdfs.py --source /data/maven/euv/l2 --interval 600
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+import traceback
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from scipy.integrate import simpson, trapezoid
+from parameter_sweep import get_cdf_files, match_dates_with_cdf, convert_hhmmss_to_unix, load_cdf, sweep_day
+from energy_uncertainty import window_uncertainty, N_REALIZATIONS
+
+CDF_PATTERN = re.compile(r'mvn_euv_l2_bands_(\d{8})_v(\d+)_r(\d+)\.cdf$')
+RESULT_COLUMNS = ['Date', 'start_time', 'end_time', 'duration_of_flare', 'File',
+                  'area_trapz_a', 'area_simps_a', 'area_trapz_c', 'area_simps_c',
+                  'area_above_background_trapz_a', 'area_above_background_simps_a',
+                  'area_above_background_trapz_c', 'area_above_background_simps_c']
+
+# Function to generate the month folders from start_year up to this month
+def generate_month_list(source, start_year, now=None):
+    """
+    Unlike generate_url_list in integrated_energy.py this stops at the current
+    month instead of a hard coded one, so new months show up by themselves.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    months = []
+    for year in range(start_year, now.year + 1):
+        last_month = now.month if year == now.year else 12
+        for month in range(1, last_month + 1):
+            months.append(f"{source.rstrip('/')}/{year}/{month:02}/")
+    return months
+
+# Function to list the CDF files of one month folder, over HTTP or on disk
+def list_month(month_location):
+    if month_location.startswith(('http://', 'https://')):
+        return get_cdf_files(month_location)
+    if not os.path.isdir(month_location):
+        return []
+    return [f for f in os.listdir(month_location) if f.endswith('.cdf')]
+
+# Function to find the newest version/revision of each day's bands file
+def latest_files(month_locations):
+    latest = dict()
+    for month_location in month_locations:
+        for cdf_file in list_month(month_location):
+            match = CDF_PATTERN.search(cdf_file)
+            if match is None:
+                continue
+            day, version, revision = match.group(1), int(match.group(2)), int(match.group(3))
+            if day not in latest or (version, revision) > latest[day]['version']:
+                latest[day] = {'base': month_location, 'file': os.path.basename(cdf_file),
+                               'version': (version, revision)}
+    return latest
+
+# Function to describe a day's catalog flares the same way from catalog lines and result rows
+def flare_keys(windows):
+    return sorted(f"{date} {start_time} {end_time}" for date, start_time, end_time in windows)
+
+# Function to get the flare keys of one day's catalog matches
+def day_flares(matched):
+    return flare_keys((date, line.split()[1], line.split()[3]) for date, line, file_url in matched)
+
+# Function to group the catalog matches by day
+def catalog_flares(matched_dates):
+    matched_by_day = dict()
+    for date, line, file_url in matched_dates:
+        day = CDF_PATTERN.search(file_url).group(1)
+        matched_by_day.setdefault(day, []).append((date, line, file_url))
+    return matched_by_day
+
+# Function to compare the listing and the catalog with the state file and return the days to (re)process
+def changed_days(latest, state, matched_by_day):
+    days = []
+    for day, entry in latest.items():
+        flares = day_flares(matched_by_day.get(day, []))
+        if state.get(day) != {'file': entry['file'], 'flares': flares}:
+            days.append(day)
+    return sorted(days)
+
+# Function to integrate one flare window the same way process_cdf does
+def integrate_window(day_data, start_time, end_time):
+    in_window = (day_data['time_unix'] >= start_time) & (day_data['time_unix'] <= end_time)
+    t = day_data['time_unix'][in_window]
+    areas = dict()
+    for diode in ['a', 'c']:
+        if t.size == 0:
+            print(f"No data found in the specified time range for {day_data['file']}")
+            for key in ['area_trapz_', 'area_simps_', 'area_above_background_trapz_', 'area_above_background_simps_']:
+                areas[key + diode] = 0
+            continue
+        y = day_data['data_' + diode][in_window]
+        area_trapz = trapezoid(y, t)
+        area_simps = simpson(y, x=t)
+        # Area of the trapezoid formed by the first and last points (background)
+        trapezoid_area = 0.5 * (y[0] + y[-1]) * (t[-1] - t[0])
+        areas['area_trapz_' + diode] = area_trapz
+        areas['area_simps_' + diode] = area_simps
+        areas['area_above_background_trapz_' + diode] = area_trapz - trapezoid_area
+        areas['area_above_background_simps_' + diode] = area_simps - trapezoid_area
+    return areas
+
+# Function to run the matched flares of one day through ingestion and integration
+def process_day(matched):
+    day_data = load_cdf(matched[0][2])
+    flares = []
+    rows = []
+    for date, line, file_url in matched:
+        start_time_str = line.split()[1]
+        end_time_str = line.split()[3]
+        delta_t = datetime.strptime(end_time_str, '%H:%M:%S') - datetime.strptime(start_time_str, '%H:%M:%S')
+        print(f"Processing file for date: {date}, start time: {start_time_str}, end time: {end_time_str}")
+        flare = {'date': date, 'start_time': start_time_str, 'end_time': end_time_str,
+                 'start_time_unix': convert_hhmmss_to_unix(date, start_time_str),
+                 'end_time_unix': convert_hhmmss_to_unix(date, end_time_str)}
+        row = {'Date': date, 'start_time': start_time_str, 'end_time': end_time_str,
+               'duration_of_flare': str(delta_t), 'File': os.path.basename(file_url)}
+        row.update(integrate_window(day_data, flare['start_time_unix'], flare['end_time_unix']))
+        flares.append(flare)
+        rows.append(row)
+    return day_data, flares, rows
+
+# Function to pick the Monte Carlo setting that matches the existing uncertainty file
+def uncertainty_realizations(uncertainty_file, n_realizations=None):
+    """
+    n_realizations=None follows the file: N_REALIZATIONS if it has mc_sigma_*
+    columns, 0 otherwise. An explicit value that disagrees with the file raises,
+    since the refreshed rows would not have the same columns as the rest.
+    """
+    if not os.path.exists(uncertainty_file):
+        return 0
+    columns = pd.read_csv(uncertainty_file, nrows=0).columns
+    has_mc = any(column.startswith('mc_sigma_') for column in columns)
+    if n_realizations is None:
+        return N_REALIZATIONS if has_mc else 0
+    if has_mc != (n_realizations > 1):
+        raise ValueError(f"{uncertainty_file} {'has' if has_mc else 'has no'} Monte Carlo columns "
+                         f"but n_realizations is {n_realizations}")
+    return n_realizations
+
+# Function to redo the uncertainty and sweep rows of one day, for the outputs that exist
+def update_derived_outputs(day_data, flares, rows, dates, uncertainty_file, sweep_file, n_realizations):
+    if os.path.exists(uncertainty_file):
+        uncertainty_rows = []
+        for flare, row in zip(flares, rows):
+            row = dict(row)
+            row.update(window_uncertainty(day_data, flare['start_time_unix'], flare['end_time_unix'],
+                                          n_realizations))
+            uncertainty_rows.append(row)
+        update_results(uncertainty_file, dates, uncertainty_rows)
+
+    if os.path.exists(sweep_file):
+        # sweep the same grid the existing file was made with
+        sweep = pd.read_csv(sweep_file, usecols=['pre_offset_s', 'post_offset_s', 'baseline'])
+        pre_offsets = np.unique(sweep['pre_offset_s'].to_numpy())
+        post_offsets = np.unique(sweep['post_offset_s'].to_numpy())
+        baselines = list(dict.fromkeys(sweep['baseline']))
+        frames = sweep_day(day_data, flares, pre_offsets, post_offsets, baselines)
+        update_results(sweep_file, dates, pd.concat(frames, ignore_index=True) if frames else [])
+
+# Function to replace the rows of the given dates in a results file
+def update_results(output_file, dates, rows, columns=RESULT_COLUMNS):
+    if os.path.exists(output_file):
+        # read everything as text so untouched rows are written back exactly as they were
+        results = pd.read_csv(output_file, dtype=str)
+        columns = list(results.columns)
+        results = results[~results['Date'].isin(dates)]
+    else:
+        results = pd.DataFrame(columns=columns)
+    results = pd.concat([results, pd.DataFrame(rows, columns=columns)], ignore_index=True)
+    # keep the file in catalog (chronological) order
+    order = pd.to_datetime(results['Date'] + ' ' + results['start_time'], format='%m/%d/%Y %H:%M:%S')
+    results = results.iloc[np.argsort(order.values, kind='stable')]
+    write_atomically(output_file, lambda path: results.to_csv(path, index=False))
+
+# Function to write a file through a temporary copy so a crash never leaves it half written
+def write_atomically(path, write):
+    temp_path = path + '.tmp'
+    write(temp_path)
+    os.replace(temp_path, path)
+
+# Function to read the state file (day -> {'file': CDF filename, 'flares': catalog flare keys})
+def load_state(state_file, output_file):
+    if os.path.exists(state_file):
+        with open(state_file, 'r') as file:
+            return json.load(file)
+    # first run: the results file already records which CDF and flares each row came from
+    windows_by_day = dict()
+    if os.path.exists(output_file):
+        results = pd.read_csv(output_file, dtype=str).dropna(subset=['File'])
+        for cdf_file, date, start_time, end_time in zip(results['File'], results['Date'],
+                                                         results['start_time'], results['end_time']):
+            match = CDF_PATTERN.search(cdf_file)
+            if match is not None:
+                windows_by_day.setdefault((match.group(1), cdf_file), []).append((date, start_time, end_time))
+    return {day: {'file': cdf_file, 'flares': flare_keys(windows)}
+            for (day, cdf_file), windows in windows_by_day.items()}
+
+# Function to save the state file
+def save_state(state_file, state):
+    def write(path):
+        with open(path, 'w') as file:
+            json.dump(state, file, indent=1, sort_keys=True)
+    write_atomically(state_file, write)
+
+# Function to do one poll: list, diff against the state, process the changed days
+def poll_once(source, start_year, catalog_file, output_file, state_file, now=None,
+              uncertainty_file='energy_uncertainty_results.csv', sweep_file='energy_sweep_results.csv',
+              n_realizations=None):
+    n_realizations = uncertainty_realizations(uncertainty_file, n_realizations)
+    state = load_state(state_file, output_file)
+    latest = latest_files(generate_month_list(source, start_year, now))
+    # match the whole listing every time so catalog edits are noticed too
+    cdf_urls = [(entry['base'], entry['file']) for entry in latest.values()]
+    matched_by_day = catalog_flares(match_dates_with_cdf(catalog_file, cdf_urls))
+    days = changed_days(latest, state, matched_by_day)
+    if not days:
+        print("No new or re-versioned CDF files and no catalog changes")
+        return []
+
+    print(f"{len(days)} new, re-versioned or re-cataloged day(s): {', '.join(days)}")
+    processed = []
+    for day in days:
+        matched = matched_by_day.get(day, [])
+        # drop the rows of flares this day had before, in case the catalog removed or moved some
+        previous_flares = state.get(day, {}).get('flares', [])
+        dates = {key.split()[0] for key in previous_flares} | {date for date, line, file_url in matched}
+        try:
+            if matched:
+                day_data, flares, rows = process_day(matched)
+                update_results(output_file, dates, rows)
+                update_derived_outputs(day_data, flares, rows, dates, uncertainty_file, sweep_file, n_realizations)
+            elif dates:
+                for results_file in [output_file, uncertainty_file, sweep_file]:
+                    if os.path.exists(results_file):
+                        update_results(results_file, dates, [])
+        except Exception as e:
+            # leave the state alone so this day is retried on the next poll
+            print(f"Failed to process {latest[day]['file']}: {e}")
+            continue
+        # days without M/X flares (yet) only need to be remembered
+        state[day] = {'file': latest[day]['file'],
+                      'flares': day_flares(matched)}
+        save_state(state_file, state)
+        processed.append(day)
+    return processed
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Incrementally process newly published MAVEN EUV L2 CDF files.')
+    parser.add_argument('--source', default='https://lasp.colorado.edu/maven/sdc/public/data/sci/euv/l2',
+                        help='archive URL or local directory with YYYY/MM/ subfolders')
+    parser.add_argument('--start-year', type=int, default=2023)
+    parser.add_argument('--catalog', default='flare catalog.txt')
+    parser.add_argument('--output', default='energy_analysis_results.csv')
+    parser.add_argument('--uncertainty-output', default='energy_uncertainty_results.csv')
+    parser.add_argument('--sweep-output', default='energy_sweep_results.csv')
+    parser.add_argument('--n-realizations', type=int, default=None,
+                        help='Monte Carlo realizations for the uncertainty output, must agree with the '
+                             'existing file (default: follow the file)')
+    parser.add_argument('--state', default='watch_state.json')
+    parser.add_argument('--interval', type=float, default=3600, help='seconds between polls')
+    parser.add_argument('--once', action='store_true', help='poll once and exit (for cron)')
+    args = parser.parse_args()
+
+    while True:
+        try:
+            poll_once(args.source, args.start_year, args.catalog, args.output, args.state,
+                      uncertainty_file=args.uncertainty_output, sweep_file=args.sweep_output,
+                      n_realizations=args.n_realizations)
+        except Exception:
+            # one bad poll shouldn't stop the watcher, try again next time
+            print(f"Poll failed at {datetime.now(timezone.utc):%Y-%m-%d %H:%M:%S} UTC:")
+            traceback.print_exc()
+            if args.once:
+                raise
+        if args.once:
+            break
+        time.sleep(args.interval)